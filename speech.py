@@ -1,10 +1,99 @@
 """Speech helper for low-latency macOS text-to-speech."""
 
+import atexit
+import concurrent.futures
+import contextlib
+import functools
+import itertools
 import os
+import queue
+import re
+import shutil
+import string
 import subprocess
 import sys
-import time
-from typing import Optional
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Rendered utterances kept in memory; enough for the alphabet, digits, fixed
+# phrases and a full round of target words. One-off text is never cached.
+_RENDER_CACHE_SIZE = 256
+
+# Utterances spoken verbatim over and over during a drill.
+PREWARM_PHRASES = tuple(string.ascii_lowercase + string.digits) + ("start over",)
+
+# Tags a lowercased voice id with its locale and quality in a single pass.
+# Locales are listed in preference order; "en" is any other English locale.
+_VOICE_TAG_RE = re.compile(
+    r"(?P<enhanced>com\.apple\.voice\.enhanced)(?=\.)"
+    r"|(?P<compact>com\.apple\.voice\.compact)(?=\.)"
+    r"|(?P<samantha>samantha)"
+    r"|(?P<us>\.?en[-_]us)"
+    r"|(?P<gb>\.?en[-_]gb)"
+    r"|(?P<au>\.?en[-_]au)"
+    r"|(?P<en>\.en[-_])"
+)
+_LOCALE_PRIORITY = ("us", "gb", "au", "en")
+
+
+@functools.lru_cache(maxsize=1)
+def _completion_delegate_class() -> type:
+    """Create (once) the delegate class that flags finished speech or playback.
+
+    Only callbacks from `waiting_on` count, so a late one for an earlier
+    sound cannot end the wait for the next.
+    """
+    from Foundation import NSObject  # type: ignore
+
+    class SpellGymCompletionDelegate(NSObject):  # type: ignore[misc, valid-type]
+        def speechSynthesizer_didFinishSpeaking_(self, sender, finished):
+            if sender == self.waiting_on:
+                self.done.set()
+
+        def sound_didFinishPlaying_(self, sound, finished):
+            if sound == self.waiting_on:
+                self.done.set()
+
+    return SpellGymCompletionDelegate
+
+
+@functools.lru_cache(maxsize=1)
+def _available_voices() -> Tuple[str, ...]:
+    """Installed synthesizer voices; the registry scan only runs once."""
+    from AppKit import NSSpeechSynthesizer  # type: ignore
+
+    return tuple(str(v) for v in NSSpeechSynthesizer.availableVoices())
+
+
+@functools.lru_cache(maxsize=None)
+def _which(name: str) -> str:
+    """Absolute path of a command, looked up on PATH only once."""
+    return shutil.which(name) or name
+
+
+def _run_tool(name: str, *args: str) -> None:
+    """Run a macOS audio tool and wait for it; raises CalledProcessError.
+
+    An absolute executable path and close_fds=False let CPython start the
+    child with posix_spawn instead of fork+exec.
+    """
+    subprocess.run([_which(name), *args], check=True, close_fds=False)
+
+
+@contextlib.contextmanager
+def _exit_on_tool_error() -> Iterator[None]:
+    """Report a missing or failing `_run_tool` command and exit."""
+    try:
+        yield
+    except FileNotFoundError as exc:
+        tool = os.path.basename(exc.filename or "say")
+        print(f"Error: macOS '{tool}' command is not available.", file=sys.stderr)
+        sys.exit(1)
+    except subprocess.CalledProcessError as exc:
+        tool = os.path.basename(exc.cmd[0])
+        print(f"Error while running '{tool}': {exc}", file=sys.stderr)
+        sys.exit(1)
 
 
 class SpeechEngine:
@@ -16,14 +105,30 @@ class SpeechEngine:
         self._warned_fallback = False
         self._warned_no_english_voice = False
         self._say_voice = "Samantha"  # English voice for `say`
+        self._voice_id = ""  # engine voice, part of the render cache key
+        self._cache_dir = None  # type: Optional[str]
+        self._cache_names = itertools.count()
+        self._render = functools.lru_cache(maxsize=_RENDER_CACHE_SIZE)(self._render_uncached)
+        self._synth_done = threading.Event()
+        self._sound_done = threading.Event()
+        self._synth_delegate = None  # type: Optional[object]
+        self._sound_delegate = None  # type: Optional[object]
+        self._queue = queue.Queue()  # type: queue.Queue
+        self._generation = 0  # bumped to drop queued utterances
+        self._worker = None  # type: Optional[threading.Thread]
+        self._worker_exit = None  # type: Optional[SystemExit]
+        self._render_lock = threading.Lock()  # one synthesis at a time
+        self._render_queue = queue.PriorityQueue()  # type: queue.PriorityQueue
+        self._render_order = itertools.count()  # FIFO among equal priorities
+        self._render_worker = None  # type: Optional[threading.Thread]
 
         try:
             from AppKit import NSSpeechSynthesizer  # type: ignore
 
-            available = NSSpeechSynthesizer.availableVoices()
-            voice_id = self._select_english_voice(available)
+            voice_id = self._select_english_voice(_available_voices())
             if voice_id is not None:
                 self._synth = NSSpeechSynthesizer.alloc().initWithVoice_(voice_id)
+                self._voice_id = voice_id
                 print(f"Using speech engine voice: {voice_id}")
             else:
                 self._synth = NSSpeechSynthesizer.alloc().init()
@@ -34,97 +139,290 @@ class SpeechEngine:
                 )
 
             self._use_pyobjc = self._synth is not None
+            if self._use_pyobjc:
+                delegate_class = _completion_delegate_class()
+                self._synth_delegate = delegate_class.alloc().init()
+                self._synth_delegate.done = self._synth_done
+                self._synth_delegate.waiting_on = self._synth
+                self._synth.setDelegate_(self._synth_delegate)
+                self._sound_delegate = delegate_class.alloc().init()
+                self._sound_delegate.done = self._sound_done
+                self._sound_delegate.waiting_on = None
         except Exception:
             self._use_pyobjc = False
 
+        if os.getenv("SPELL_GYM_PREWARM") == "1":
+            self._warm_up()
+
     @staticmethod
-    def _select_english_voice(voices: list) -> Optional[str]:
+    def _select_english_voice(voices: Sequence[str]) -> Optional[str]:
         """Pick an English voice with locale and quality preferences."""
 
-        def norm_list(vs: list) -> list[str]:
-            return [str(v) for v in vs]
-
-        def is_en_us(vid: str) -> bool:
-            low = vid.lower()
-            return "en-us" in low or "en_us" in low
+        # (voice_id, voice_id.lower(), tags found by _VOICE_TAG_RE)
+        Candidate = Tuple[str, str, Set[str]]
 
-        def is_en_gb(vid: str) -> bool:
-            low = vid.lower()
-            return "en-gb" in low or "en_gb" in low
-
-        def is_en_au(vid: str) -> bool:
-            low = vid.lower()
-            return "en-au" in low or "en_au" in low
-
-        def is_en_other(vid: str) -> bool:
-            low = vid.lower()
-            return (".en-" in low or ".en_" in low) and not (
-                is_en_us(vid) or is_en_gb(vid) or is_en_au(vid)
-            )
-
-        def is_enhanced(vid: str) -> bool:
-            return "com.apple.voice.enhanced." in vid.lower()
-
-        def is_compact(vid: str) -> bool:
-            return "com.apple.voice.compact." in vid.lower()
-
-        def pick_prioritized(cands: list[str]) -> Optional[str]:
+        def pick_prioritized(cands: list[Candidate]) -> Optional[str]:
             if not cands:
                 return None
-            sams = [v for v in cands if "samantha" in v.lower()]
-            if sams:
-                return sorted(sams, key=str.lower)[0]
-            return sorted(cands, key=str.lower)[0]
+            sams = [c for c in cands if "samantha" in c[2]]
+            return min(sams or cands, key=lambda c: c[1])[0]
 
-        def choose_for_locale(cands: list[str]) -> Optional[str]:
+        def choose_for_locale(cands: list[Candidate]) -> Optional[str]:
             if not cands:
                 return None
-            enhanced = [v for v in cands if is_enhanced(v)]
+            enhanced = [c for c in cands if "enhanced" in c[2]]
             choice = pick_prioritized(enhanced)
             if choice:
                 return choice
-            compact = [v for v in cands if is_compact(v)]
+            compact = [c for c in cands if "compact" in c[2]]
             choice = pick_prioritized(compact)
             if choice:
                 return choice
             return pick_prioritized(cands)
 
+        normalized = [(str(v), str(v).lower()) for v in voices]
+
         env_voice = os.getenv("SPELL_GYM_VOICE_ID")
         if env_voice:
             env_voice_norm = env_voice.strip().lower()
-            for vid in voices:
-                if str(vid).lower() == env_voice_norm:
-                    return str(vid)
+            for vid, low in normalized:
+                if low == env_voice_norm:
+                    return vid
+
+        buckets: Dict[str, list[Candidate]] = {locale: [] for locale in _LOCALE_PRIORITY}
+        for vid, low in normalized:
+            tags = {m.lastgroup for m in _VOICE_TAG_RE.finditer(low)}
+            for locale in _LOCALE_PRIORITY:
+                if locale in tags:
+                    buckets[locale].append((vid, low, tags))
+                    break
+
+        for locale in _LOCALE_PRIORITY:
+            choice = choose_for_locale(buckets[locale])
+            if choice:
+                return choice
 
-        normalized = norm_list(voices)
+        return None
 
-        en_us = [v for v in normalized if is_en_us(v)]
-        choice = choose_for_locale(en_us)
-        if choice:
-            return choice
+    @staticmethod
+    def _wait(done: threading.Event, busy: Callable[[], bool]) -> None:
+        """Block while `busy()` holds.
 
-        en_gb = [v for v in normalized if is_en_gb(v)]
-        choice = choose_for_locale(en_gb)
-        if choice:
-            return choice
+        The delegate callback sets `done` to cut each poll short. Callbacks
+        are delivered through the run loop, so pump it while waiting; a
+        worker thread's run loop has no sources and returns at once, leaving
+        the `done` wait as the pause.
+        """
+        from Foundation import NSDate, NSDefaultRunLoopMode, NSRunLoop  # type: ignore
 
-        en_au = [v for v in normalized if is_en_au(v)]
-        choice = choose_for_locale(en_au)
-        if choice:
-            return choice
+        loop = NSRunLoop.currentRunLoop()
+        while busy():
+            deadline = NSDate.dateWithTimeIntervalSinceNow_(0.01)
+            if not loop.runMode_beforeDate_(NSDefaultRunLoopMode, deadline):
+                done.wait(0.01)
+            done.clear()
 
-        en_other = [v for v in normalized if is_en_other(v)]
-        choice = choose_for_locale(en_other)
-        if choice:
-            return choice
+    def _speak_direct(self, text: str) -> None:
+        with self._render_lock:
+            self._synth_done.clear()
+            self._synth.startSpeakingString_(text)
+            self._wait(self._synth_done, self._synth.isSpeaking)
 
-        return None
+    def _new_cache_path(self) -> str:
+        if self._cache_dir is None:
+            self._cache_dir = tempfile.mkdtemp(prefix="spell-gym-")
+            atexit.register(self._remove_cache_dir)
+        return os.path.join(self._cache_dir, f"{next(self._cache_names)}.aiff")
 
-    def speak(self, text: str) -> None:
+    def _remove_cache_dir(self) -> None:
+        """Stop background rendering, then delete the rendered files."""
+        self._stop_renders()
+        if self._cache_dir is not None:
+            shutil.rmtree(self._cache_dir, True)
+
+    def _cache_voice(self) -> str:
+        if self._use_pyobjc:
+            return self._voice_id
+        return os.getenv("SPELL_GYM_SAY_VOICE", self._say_voice)
+
+    def _render_uncached(self, voice: str, text: str) -> object:
+        """Synthesize `text` once; return an NSSound (PyObjC) or AIFF path (`say`).
+
+        Called through the LRU cache in `self._render`, keyed by (voice, text).
+        """
+        with self._render_lock:
+            return self._synthesize_to_cache(voice, text)
+
+    def _synthesize_to_cache(self, voice: str, text: str) -> object:
+        path = self._new_cache_path()
         if self._use_pyobjc and self._synth is not None:
-            self._synth.startSpeakingString_(text)
-            while self._synth.isSpeaking():
-                time.sleep(0.01)
+            from AppKit import NSSound  # type: ignore
+            from Foundation import NSURL, NSData  # type: ignore
+
+            self._synth_done.clear()
+            self._synth.startSpeakingString_toURL_(text, NSURL.fileURLWithPath_(path))
+            self._wait(self._synth_done, self._synth.isSpeaking)
+            data = NSData.dataWithContentsOfFile_(path)
+            os.remove(path)
+            if data is None:
+                return None
+            sound = NSSound.alloc().initWithData_(data)
+            if sound is not None:
+                sound.setDelegate_(self._sound_delegate)
+            return sound
+
+        try:
+            _run_tool("say", "-v", voice, "-o", path, text)
+        except subprocess.CalledProcessError:
+            print(
+                f"Warning: Voice '{voice}' unavailable; falling back to system default.",
+                file=sys.stderr,
+            )
+            _run_tool("say", "-o", path, text)
+        return path
+
+    def _warm_up(self) -> None:
+        """Pay the synthesizer cold-start cost now rather than on the first key."""
+        if self._use_pyobjc and self._synth is not None:
+            self._speak_direct(" ")
+        self.prewarm()
+
+    def prewarm(self, texts: Iterable[str] = PREWARM_PHRASES) -> None:
+        """Render `texts` ahead of time so their first playback is instant."""
+        voice = self._cache_voice()
+        with _exit_on_tool_error():
+            for text in texts:
+                self._render(voice, text)
+
+    def prerender(self, texts: Iterable[str], priority: int = 0) -> List[concurrent.futures.Future]:
+        """Render `texts` into the cache on a background thread.
+
+        Lower `priority` values are rendered first; equal priorities keep
+        their queueing order. Each returned future resolves once its text is
+        cached (or failed to render; `speak` then retries and reports the
+        error).
+        """
+        if self._render_worker is None:
+            self._render_worker = threading.Thread(target=self._run_renders, name="render", daemon=True)
+            self._render_worker.start()
+        voice = self._cache_voice()
+        futures = []
+        for text in texts:
+            future = concurrent.futures.Future()  # type: concurrent.futures.Future
+            self._render_queue.put((priority, next(self._render_order), future, voice, text))
+            futures.append(future)
+        return futures
+
+    def _stop_renders(self) -> None:
+        """Cancel queued renders and wait for the one in progress to finish."""
+        if self._render_worker is None:
+            return
+        while True:
+            try:
+                self._render_queue.get_nowait()[2].cancel()
+            except queue.Empty:
+                break
+        # A None future is the stop sentinel; -1 sorts it ahead of any render.
+        self._render_queue.put((-1, next(self._render_order), None, "", ""))
+        self._render_worker.join()
+        self._render_worker = None
+
+    def _run_renders(self) -> None:
+        while True:
+            _, _, future, voice, text = self._render_queue.get()
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._render(voice, text)
+            except Exception:
+                pass  # speak() renders again and reports the failure
+            future.set_result(None)
+
+    @staticmethod
+    def _coalesce(batch: List[Tuple[int, str]]) -> List[Tuple[int, str, bool]]:
+        """Join runs of single characters; longer phrases stay separate.
+
+        Returns (generation, text, cache) items. A joined run is a one-off
+        string, so it is spoken directly (`cache` false) instead of taking a
+        render-cache slot; lone characters and phrases such as "start over"
+        or the target word are replayed from the cache.
+        """
+        merged = []  # type: List[List]
+        for generation, text in batch:
+            is_char = len(text) == 1
+            if merged and is_char and merged[-1][2] and merged[-1][0] == generation:
+                merged[-1][1] += " " + text
+                merged[-1][3] = False
+            else:
+                merged.append([generation, text, is_char, True])
+        return [(generation, text, cache) for generation, text, _, cache in merged]
+
+    def _run_queue(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Typing outpaced speech: say the characters already pending at
+            # once rather than paying a start/stop per character.
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for generation, text, cache in self._coalesce(batch):
+                    if generation == self._generation and self._worker_exit is None:
+                        self._play(text, cache=cache)
+            except SystemExit as exc:
+                # Re-raised on the caller's thread by the next speak call.
+                self._worker_exit = exc
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def speak_async(self, text: str) -> None:
+        """Queue `text` to be spoken in order on a background thread."""
+        if self._worker_exit is not None:
+            raise self._worker_exit
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run_queue, name="speech", daemon=True)
+            self._worker.start()
+        self._queue.put((self._generation, text))
+
+    def clear_pending(self) -> None:
+        """Drop queued utterances that have not started playing yet."""
+        self._generation += 1
+
+    def wait_pending(self) -> None:
+        """Block until everything queued by `speak_async` has been spoken."""
+        self._queue.join()
+        if self._worker_exit is not None:
+            raise self._worker_exit
+
+    def speak(self, text: str, cache: bool = True) -> None:
+        """Finish any queued speech, then speak `text` and wait for it.
+
+        Pass `cache=False` for one-off text that will not be spoken again.
+        """
+        self.wait_pending()
+        self._play(text, cache=cache)
+
+    def _play(self, text: str, cache: bool = True) -> None:
+        """Speak `text` and wait for it.
+
+        With `cache`, the rendering is kept for replay; otherwise the text is
+        spoken directly, which for one-off strings is a single synthesis.
+        """
+        if self._use_pyobjc and self._synth is not None:
+            sound = self._render(self._voice_id, text) if cache else None
+            if sound is None:
+                # Uncached, or rendering to a file failed: speak directly.
+                self._speak_direct(text)
+                return
+            self._sound_done.clear()
+            self._sound_delegate.waiting_on = sound
+            sound.play()
+            self._wait(self._sound_done, sound.isPlaying)
             return
 
         if not self._warned_fallback:
@@ -134,26 +432,57 @@ class SpeechEngine:
             )
             self._warned_fallback = True
 
-        say_voice = os.getenv("SPELL_GYM_SAY_VOICE", self._say_voice)
+        with _exit_on_tool_error():
+            if cache:
+                path = self._render(self._cache_voice(), text)
+                _run_tool("afplay", path)
+            else:
+                self._say(text)
+
+    def _say(self, text: str) -> None:
+        """Speak `text` with one `say` run, without rendering to a file."""
+        voice = self._cache_voice()
         try:
-            subprocess.run(["say", "-v", say_voice, text], check=True)
+            _run_tool("say", "-v", voice, text)
         except subprocess.CalledProcessError:
             print(
-                f"Warning: Voice '{say_voice}' unavailable; falling back to system default.",
+                f"Warning: Voice '{voice}' unavailable; falling back to system default.",
                 file=sys.stderr,
             )
-            subprocess.run(["say", text], check=True)
-        except FileNotFoundError:
-            print("Error: macOS 'say' command is not available.", file=sys.stderr)
-            sys.exit(1)
-        except subprocess.CalledProcessError as exc:
-            print(f"Error while running 'say': {exc}", file=sys.stderr)
-            sys.exit(1)
+            _run_tool("say", text)
 
 
-_speech_engine = SpeechEngine()
+_speech_engine = None  # type: Optional[SpeechEngine]
 
 
-def speak(text: str) -> None:
+def _engine() -> SpeechEngine:
+    """Create the shared engine on first use so importing this module is cheap."""
+    global _speech_engine
+    if _speech_engine is None:
+        _speech_engine = SpeechEngine()
+    return _speech_engine
+
+
+def speak(text: str, cache: bool = True) -> None:
     """Speak the given text using the configured speech engine."""
-    _speech_engine.speak(text)
+    _engine().speak(text, cache)
+
+
+def speak_async(text: str) -> None:
+    """Queue text to be spoken without waiting for it."""
+    _engine().speak_async(text)
+
+
+def clear_pending() -> None:
+    """Drop queued text that has not started playing yet."""
+    _engine().clear_pending()
+
+
+def wait_pending() -> None:
+    """Block until all queued text has been spoken."""
+    _engine().wait_pending()
+
+
+def prerender(texts: Iterable[str], priority: int = 0) -> List[concurrent.futures.Future]:
+    """Render texts into the speech cache in the background, lowest priority first."""
+    return _engine().prerender(texts, priority)
@@ -1,24 +1,99 @@
 #!/usr/bin/env python3
 """Spelling drill using macOS speech."""
 
+import codecs
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
 import pathlib
 import random
 import sys
-import termios
-import tty
-from typing import List, Tuple
+from typing import FrozenSet, Iterator, List, Optional, Tuple
 
 
 LISTS_DIR = pathlib.Path(__file__).resolve().parent / "lists"
+# Sidecar in LISTS_DIR holding the parsed lines, keyed by the files' stats.
+WORD_CACHE_NAME = ".wordcache.json"
+# Bump when the cached content changes meaning, to invalidate old sidecars.
+_WORD_CACHE_VERSION = 3
 
+# Raw keystroke bytes (ints, as yielded by iterating `bytes`) with special meaning.
+_KEY_END = frozenset(b"\n\r")
+_KEY_BACKSPACE = frozenset(b"\x7f\b")
+_KEY_INTERRUPT = 0x03  # Ctrl-C
 
-def gather_words(lists_dir: pathlib.Path, file_name: str | None = None) -> List[Tuple[str, List[str]]]:
+# (display spelling, all accepted spellings, casefolded spellings for matching)
+WordEntry = Tuple[str, List[str], FrozenSet[str]]
+
+
+def _read_word_file(path: str) -> List[str]:
+    """Return the stripped, non-empty lines of one list file.
+
+    Lines are streamed from the file object; no full-file copy is held.
+    """
+    with open(path, encoding="utf-8") as fh:
+        return [word for line in fh if (word := line.strip())]
+
+
+def _files_signature(paths: List[str]) -> list:
+    """Identify a set of list files by name, modification time, and size.
+
+    Built from lists rather than tuples so it compares equal after a JSON
+    round trip.
+    """
+    signature = []
+    for path in paths:
+        st = os.stat(path)
+        signature.append([os.path.basename(path), st.st_mtime_ns, st.st_size])
+    return signature
+
+
+def _load_cached_words(cache_path: pathlib.Path, signature: list) -> Optional[List[str]]:
+    """Return the cached lines if they were built from the same files."""
+    # JSON, not pickle: the lists dir may be a shared or synced folder, and
+    # loading a pickle from it would run whatever code the file holds.
+    try:
+        with open(cache_path, encoding="utf-8") as fh:
+            cached_signature, words = json.load(fh)
+    except Exception:  # missing or unreadable cache is just a miss
+        return None
+    if cached_signature != signature or not isinstance(words, list):
+        return None
+    if not all(isinstance(word, str) for word in words):
+        return None
+    return words
+
+
+def _save_cached_words(cache_path: pathlib.Path, signature: list, words: List[str]) -> None:
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump([signature, words], fh, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # read-only lists dir: simply run uncached
+
+
+def parse_word(line: str) -> WordEntry:
+    """Split a list line into its display spelling and accepted variants."""
+    # Folded spellings are interned so a matching (also interned) answer hits
+    # the identity fast path of the set lookup.
+    if " OR " not in line:  # common case: a single spelling
+        return line, [line], frozenset((sys.intern(line.casefold()),))
+    # Support variant spellings separated by ' OR '
+    variants = [p.strip() for p in line.split(" OR ") if p.strip()]
+    return variants[0], variants, frozenset(sys.intern(v.casefold()) for v in variants)
+
+
+def gather_words(lists_dir: pathlib.Path, file_name: str | None = None) -> List[str]:
     """Collect non-empty lines from .txt files under lists_dir.
 
     If `file_name` is provided, only that file (must end with .txt) is read.
-    Otherwise all `*.txt` files under `lists_dir` are used.
+    Otherwise all `*.txt` files under `lists_dir` are used. Lines are returned
+    unparsed; run `parse_word` on the ones actually used.
     """
-    words: List[Tuple[str, List[str]]] = []
     if file_name:
         # Allow filenames provided without the .txt suffix
         if not file_name.endswith(".txt"):
@@ -26,76 +101,129 @@ def gather_words(lists_dir: pathlib.Path, file_name: str | None = None) -> List[
         path = lists_dir / file_name
         if not path.exists():
             raise SystemExit(f"Requested file not found: {path}")
-        for line in path.read_text(encoding="utf-8").splitlines():
-            raw = line.strip()
-            if not raw:
-                continue
-            # Support variant spellings separated by ' OR '
-            parts = [p.strip() for p in raw.split(" OR ") if p.strip()]
-            if not parts:
-                continue
-            display = parts[0]
-            variants = parts
-            words.append((display, variants))
+        paths = [str(path)]
     else:
-        for path in sorted(lists_dir.glob("*.txt")):
-            for line in path.read_text(encoding="utf-8").splitlines():
-                raw = line.strip()
-                if not raw:
-                    continue
-                parts = [p.strip() for p in raw.split(" OR ") if p.strip()]
-                if not parts:
-                    continue
-                display = parts[0]
-                variants = parts
-                words.append((display, variants))
+        with os.scandir(lists_dir) as entries:
+            paths = sorted(e.path for e in entries if e.name.endswith(".txt") and e.is_file())
+    # Re-read the lists only when a file was added, removed, or modified.
+    signature = [_WORD_CACHE_VERSION, _files_signature(paths)]
+    cache_path = lists_dir / WORD_CACHE_NAME
+    words = _load_cached_words(cache_path, signature)
+    if words is None:
+        words = []
+        # Overlap the reads: on slow (network or iCloud-synced) folders each
+        # file would otherwise wait for the previous one.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            for lines in pool.map(_read_word_file, paths):
+                words.extend(lines)
+        # Lists may overlap; keep the first occurrence so a round never
+        # repeats a word.
+        words = list(dict.fromkeys(words))
+        _save_cached_words(cache_path, signature, words)
     if not words:
         raise RuntimeError(f"No words found in {lists_dir}")
     return words
 
 
-from speech import speak
+@contextlib.contextmanager
+def raw_mode(fd: int) -> Iterator[None]:
+    """Turn off echo and line buffering on `fd` until the block exits.
 
+    Does nothing when `fd` is not a terminal (e.g. input piped in).
+    """
+    if not os.isatty(fd):
+        yield
+        return
+    import termios
 
-def capture_input_with_audio(prompt: str = "> ", repeat_word: str | None = None) -> Tuple[str, int]:
-    """Read characters without echo; speak each one as it is typed.
+    old_attrs = termios.tcgetattr(fd)
+    new_attrs = old_attrs[:]
+    new_attrs[3] = old_attrs[3] & ~(termios.ECHO | termios.ICANON)
+    # TCSANOW: nothing is pending on stdout worth waiting for.
+    termios.tcsetattr(fd, termios.TCSANOW, new_attrs)
+    try:
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSANOW, old_attrs)
+
+
+def _wait_for_enter(fd: int) -> None:
+    """Block until Enter is pressed on raw-mode `fd`; other keys are ignored."""
+    # Show any pending prompt before blocking, as input() would.
+    sys.stdout.flush()
+    if not os.isatty(fd):
+        sys.stdin.readline()
+        return
+    while True:
+        data = os.read(fd, 64)
+        if not data or not _KEY_END.isdisjoint(data):
+            return
+        if _KEY_INTERRUPT in data:
+            raise KeyboardInterrupt
+
+
+def _capture_in_raw(fd: int, prompt: str = "> ", repeat_word: str | None = None) -> Tuple[str, int]:
+    """Read characters from raw-mode `fd`; speak each one as it is typed.
 
-    Backspace/delete clears the buffer, increments a retry counter, and, if
-    provided, re-speaks the current target word.
+    Characters are queued for speech so reading never waits on audio; Enter
+    waits for the queue to drain.
+    Backspace/delete clears the buffer, drops any not-yet-spoken characters,
+    increments a retry counter, and, if provided, re-speaks the current
+    target word.
     Returns (typed_text, retries_from_backspace).
+    When `fd` is not a terminal, a plain line is read with no per-key speech.
     """
-    sys.stdout.write(prompt)
+    if not os.isatty(fd):
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+        return sys.stdin.readline().rstrip("\r\n"), 0
+
+    from speech import clear_pending, speak_async, wait_pending
+
+    # Write straight to the fd, after flushing what sys.stdout still holds so
+    # the earlier lines come out first.
+    out_fd = sys.stdout.fileno()
     sys.stdout.flush()
+    os.write(out_fd, prompt.encode())
 
-    fd = sys.stdin.fileno()
-    old_attrs = termios.tcgetattr(fd)
-    try:
-        new_attrs = termios.tcgetattr(fd)
-        new_attrs[3] = new_attrs[3] & ~(termios.ECHO | termios.ICANON)
-        termios.tcsetattr(fd, termios.TCSADRAIN, new_attrs)
-
-        typed: List[str] = []
-        backspace_retries = 0
-        while True:
-            ch = sys.stdin.read(1)
-            if ch in ("\n", "\r"):
-                sys.stdout.write("\n")
-                sys.stdout.flush()
+    # Invalid UTF-8 (e.g. from a Latin-1 terminal) is dropped, not fatal.
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    typed = bytearray()
+    backspace_retries = 0
+    # Invariant: the per-key path below never writes or flushes stdout; the
+    # only feedback is queued speech. Output happens once, on Enter or EOF.
+    entered = False
+    while not entered:
+        # One read per burst of input (e.g. a paste), not per byte.
+        data = os.read(fd, 64)
+        if not data:  # EOF ends the answer like Enter
+            break
+        for byte in data:
+            if byte in _KEY_END:
+                entered = True
                 break
-            if ch == "\x03":  # Ctrl-C
+            if byte == _KEY_INTERRUPT:
                 raise KeyboardInterrupt
-            if ch in ("\x7f", "\b"):  # Backspace/delete
+            if byte in _KEY_BACKSPACE:
                 typed.clear()
+                decoder.reset()
                 backspace_retries += 1
-                speak("start over")
+                clear_pending()
+                speak_async("start over")
                 if repeat_word:
-                    speak(repeat_word)
+                    speak_async(repeat_word)
                 continue
-            typed.append(ch)
-            speak(ch)
-        return "".join(typed), backspace_retries
-    finally:
-        termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
+            typed.append(byte)
+            # Empty until the last byte of a multibyte character arrives.
+            ch = decoder.decode(bytes((byte,)))
+            if ch:
+                # Lowercase so typed capitals hit the pre-rendered alphabet.
+                speak_async(ch.lower())
+    sys.stdout.flush()
+    os.write(out_fd, b"\n")
+    # Let the echo finish before the result is shown.
+    wait_pending()
+    return typed.decode("utf-8", "ignore"), backspace_retries
 
 
 def parse_round_count() -> int:
@@ -119,48 +247,78 @@ def parse_optional_filename() -> str | None:
 
 
 def main() -> None:
+    # Ask for a little more CPU priority so scheduler jitter does not delay the
+    # spoken echo. Raising priority needs privileges; best effort only. Done
+    # first: on Linux niceness is per thread, and the speech threads (and the
+    # processes they spawn) inherit it only if they start afterwards.
+    try:
+        os.nice(-5)
+    except OSError:
+        pass
+
+    round_count = parse_round_count()
     filename = parse_optional_filename()
     words = gather_words(LISTS_DIR, file_name=filename)
-    round_count = parse_round_count()
     if len(words) < round_count:
         raise RuntimeError(f"Need at least {round_count} words; found {len(words)} in {LISTS_DIR}")
 
-    game_words = random.sample(words, round_count)
+    # Sample indices (cheap ints) and parse only the chosen lines.
+    game_words = [parse_word(words[i]) for i in random.sample(range(len(words)), round_count)]
     score = 0
     total_retries = 0
 
-    for idx, (display, variants) in enumerate(game_words, start=1):
-        print(f"Word {idx} of {round_count}. Press Enter when you're ready.")
-        input()
-
-        print("Listen carefully...")
-        speak(display)
-        print("Type the spelling; input is hidden and spoken back as you type. Press Enter when done.")
-        user_input, retries_from_backspace = capture_input_with_audio(repeat_word=display)
-        total_retries += retries_from_backspace
-        # Accept any of the variants as correct (case-insensitive match)
-        user_input_norm = user_input.lower()
-        variants_norm = [v.lower() for v in variants]
-        is_correct = user_input_norm in variants_norm
-        if is_correct:
-            score += 1
-
-        print(f"Target : {display}")
-        print(f"You typed: {user_input}")
-        print(f"Result : {'correct' if is_correct else 'incorrect'}")
-        # Show accepted variants for learning/clarity
-        if len(variants) > 1:
-            print(f"Accepted variants: {', '.join(variants)}")
-        print(f"Score  : {score} / {idx}\n")
-
-        speak(f"You typed {user_input or 'nothing'}")
-        speak("The answer is correct" if is_correct else "The answer is not correct")
-        speak(f"Score is {score} out of {idx}")
-
-    print(f"Final score: {score} / {round_count}")
-    print(f"Total retries: {total_retries}")
-    speak(f"Final score {score} out of {round_count}")
-    speak(f"Total retries {total_retries}")
+    # Imported only once the drill is about to run: loading AppKit is slow.
+    from speech import PREWARM_PHRASES, prerender, speak
+
+    # Render one word ahead: word N+1 is synthesized while word N is played
+    # and typed, leaving the synthesizer free for keystrokes otherwise. The
+    # first of these renders also loads the voice while the first prompt is
+    # shown, so no separate warm-up is needed.
+    (next_render,) = prerender([game_words[0][0]])
+    fd = sys.stdin.fileno()
+    if os.isatty(fd):
+        # Letters, digits and Backspace feedback, so keystrokes replay from
+        # cache. Queued behind target words so the look-ahead is never
+        # starved. Piped answers are read as whole lines, with no key echo.
+        prerender(PREWARM_PHRASES, priority=1)
+    with raw_mode(fd):
+        for idx, (display, variants, variants_folded) in enumerate(game_words, start=1):
+            print(f"Word {idx} of {round_count}. Press Enter when you're ready.")
+            _wait_for_enter(fd)
+
+            print("Listen carefully...")
+            # Target words are first in the render queue, so waiting for this
+            # one costs at most the render already in progress.
+            next_render.result()
+            if idx < round_count:
+                (next_render,) = prerender([game_words[idx][0]])
+            speak(display)
+            print("Type the spelling; input is hidden and spoken back as you type. Press Enter when done.")
+            user_input, retries_from_backspace = _capture_in_raw(fd, repeat_word=display)
+            total_retries += retries_from_backspace
+            # Accept any of the variants as correct (case-insensitive match)
+            is_correct = sys.intern(user_input.casefold()) in variants_folded
+            if is_correct:
+                score += 1
+
+            # Collect the summary and emit it with one write and one flush.
+            buf = io.StringIO()
+            buf.write(f"Target : {display}\n")
+            buf.write(f"You typed: {user_input}\n")
+            buf.write(f"Result : {'correct' if is_correct else 'incorrect'}\n")
+            # Show accepted variants for learning/clarity
+            if len(variants) > 1:
+                buf.write(f"Accepted variants: {', '.join(variants)}\n")
+            buf.write(f"Score  : {score} / {idx}\n\n")
+            sys.stdout.write(buf.getvalue())
+            sys.stdout.flush()
+
+            verdict = "The answer is correct" if is_correct else "The answer is not correct"
+            speak(f"You typed {user_input or 'nothing'}. {verdict}. Score is {score} out of {idx}.", cache=False)
+
+    sys.stdout.write(f"Final score: {score} / {round_count}\nTotal retries: {total_retries}\n")
+    sys.stdout.flush()
+    speak(f"Final score {score} out of {round_count}. Total retries {total_retries}.", cache=False)
 
 
 if __name__ == "__main__":